@@ -0,0 +1,161 @@
+"""Funciones compartidas del dashboard: acceso, carga, limpieza y gráficos."""
+
+import hmac
+
+import streamlit as st
+from streamlit_gsheets import GSheetsConnection
+import numpy as np
+import polars as pl
+import plotly.express as px
+
+# --- CONTRASEÑA ---
+def check_password():
+    """Gestión simple de contraseña."""
+    if "password_correct" not in st.session_state:
+        st.session_state.password_correct = False
+
+    if st.session_state.password_correct:
+        return True
+
+    # Contenedor para poder borrar el formulario sin relanzar el script
+    login = st.empty()
+    with login.container():
+        st.markdown("### 🔒 Acceso Restringido")
+        pwd = st.text_input("Contraseña:", type="password")
+    
+    if pwd:
+        # Verifica contra secrets.toml (comparación en tiempo constante)
+        if hmac.compare_digest(pwd.encode(), st.secrets["passwords"]["access_code"].encode()):
+            st.session_state.password_correct = True
+            login.empty()
+            return True
+        st.error("Contraseña incorrecta")
+    return False
+
+# --- CARGA DE DATOS ---
+@st.cache_data(ttl=60) 
+def load_data():
+    conn = st.connection("gsheets", type=GSheetsConnection)
+    # Usamos el ID de la hoja que confirmaste que funciona
+    df = conn.read(worksheet="598707666") 
+    return df
+
+# --- LIMPIEZA Y PREPARACIÓN ---
+
+# Caracteres a eliminar de 'Peso Real': '%', '€' y el punto de miles (Europa)
+_PESO_STRIP = r'[%€.]'
+
+@st.cache_data(ttl=60)
+def prepare(df_raw):
+    """Limpia, consolida y ordena la hoja. Devuelve None si falta 'Peso Real'."""
+    # A. Limpieza de nombres de columnas
+    df_raw.columns = df_raw.columns.str.strip()
+
+    # B. Renombrado INTELIGENTE (Mapeo por posición para evitar errores)
+    expected_cols = [
+        "Fund ISIN", "Fondo", "Accion", "Ticker", "ISIN Security", 
+        "Sector", "Pais", "Weight Fund", "Alloc", "Peso Real"
+    ]
+    current_cols = list(df_raw.columns)
+    mapping = {}
+    for i, new_name in enumerate(expected_cols):
+        if i < len(current_cols):
+            mapping[current_cols[i]] = new_name
+
+    df_raw = df_raw.rename(columns=mapping)
+
+    if "Peso Real" not in df_raw.columns:
+        return None
+
+    # Solo usamos 4 de las 10 columnas: descartamos el resto cuanto antes
+    df_raw = df_raw.loc[:, ["Accion", "Peso Real", "Pais", "Sector"]]
+
+    # Texto homogéneo para pasar a Polars (los NaN de pandas quedan como nulos)
+    df_pl = pl.from_pandas(df_raw.astype({
+        "Accion": "string",
+        "Pais": "string",
+        "Sector": "string",
+        "Peso Real": str,
+    }))
+
+    # C. Limpieza de Números: quita caracteres y espacios ("3,25 %"),
+    # coma -> punto decimal, a float32
+    try:
+        df_pl = df_pl.with_columns(
+            pl.col("Peso Real")
+            .str.replace_all(_PESO_STRIP, "")
+            .str.strip_chars()
+            .str.replace(",", ".", literal=True)
+            .cast(pl.Float32, strict=False)
+            .fill_nan(0.0)
+            .fill_null(0.0)
+        )
+    except Exception as e:
+        st.error(f"Error limpiando números: {e}")
+        # Sin pesos válidos no se puede sumar: los dejamos a 0
+        df_pl = df_pl.with_columns(pl.lit(0.0, dtype=pl.Float32).alias("Peso Real"))
+
+    df = (
+        df_pl
+        # D. Agrupación (Consolidar acciones repetidas)
+        .filter(pl.col("Accion").is_not_null())
+        .group_by("Accion", maintain_order=True)
+        .agg(
+            pl.col("Peso Real").sum(),
+            # Primer valor no vacío, como hacía pandas con "first"
+            pl.col("Pais").drop_nulls().first(),
+            pl.col("Sector").drop_nulls().first(),
+        )
+        # Ordenamos de mayor a menor (estable: los empates conservan el orden de la hoja)
+        .sort("Peso Real", descending=True, maintain_order=True)
+        # Categorías para que los groupby posteriores usen códigos enteros
+        .with_columns(pl.col("Accion", "Pais", "Sector").cast(pl.Categorical))
+    )
+
+    # Plotly y Streamlit trabajan con pandas: convertimos solo el resultado
+    return df.to_pandas()
+
+# --- RESÚMENES por País y Sector (reutilizados en KPIs y pasteles) ---
+@st.cache_data(ttl=60)
+def summaries(dataframe):
+    """Suma de 'Peso Real' por País y por Sector."""
+    pais_sum = dataframe.groupby("Pais", observed=True, sort=False)['Peso Real'].sum()
+    sector_sum = dataframe.groupby("Sector", observed=True, sort=False)['Peso Real'].sum()
+    return pais_sum, sector_sum
+
+# --- LÓGICA DE GRÁFICOS (Pastel) ---
+def prepare_pie_data(series, threshold=0.5):
+    """Agrupa valores pequeños en 'Otros'. Devuelve (nombres, valores)."""
+    vals = series.to_numpy()
+    names = series.index.to_numpy()
+    # Una sola máscara sobre los arrays, sin crear Series intermedias
+    mask = vals >= threshold
+    main_v, main_n = vals[mask], names[mask]
+    if not mask.all():
+        main_v = np.append(main_v, vals[~mask].sum())
+        main_n = np.append(main_n, f'Otros (<{threshold}%)')
+    return main_n, main_v
+
+# --- FIGURAS (cacheadas: se reutilizan mientras no cambien sus datos) ---
+@st.cache_data(ttl=60, max_entries=32)
+def pie_figure(series):
+    """Gráfico de donut con los valores pequeños agrupados en 'Otros'."""
+    names, values = prepare_pie_data(series)
+    fig = px.pie(values=values, names=names, hole=0.4)
+    # Etiquetas DENTRO para limpieza visual
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+@st.cache_data(ttl=60, max_entries=32)
+def bar_figure(dataframe, title=None):
+    """Barras horizontales de 'Peso Real' por acción."""
+    fig = px.bar(
+        dataframe, 
+        x="Peso Real", 
+        y="Accion", 
+        orientation='h', 
+        text_auto='.2f', 
+        color="Peso Real"
+    )
+    fig.update_layout(title=title, showlegend=False, xaxis_title="Peso (%)", yaxis_title="")
+    return fig